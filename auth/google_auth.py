@@ -1,25 +1,37 @@
 # auth/google_auth.py
 
 import asyncio
+import functools
 import json
-import jwt
 import logging
+import operator
 import os
+import re
+import secrets
+import threading
+import time
+import weakref
 
-from datetime import datetime
-from typing import List, Optional, Tuple, Dict, Any
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple, Dict, Any, Union
+
+import requests
+from cachetools import TTLCache
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
-from google.auth.exceptions import RefreshError
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from auth.scopes import SCOPES, store_oauth_state
+from google.auth.exceptions import GoogleAuthError, RefreshError
+from auth.scopes import SCOPES_LIST, store_oauth_state
 from auth.redis_state_store import get_redis_store
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# orjson is an optional speedup for credential (de)serialization
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,10 +51,31 @@ def get_default_credentials_dir():
     return os.path.join(os.getcwd(), ".credentials")
 
 
-DEFAULT_CREDENTIALS_DIR = get_default_credentials_dir()
+DEFAULT_CREDENTIALS_DIR = Path(get_default_credentials_dir())
 
 # In-memory cache for session credentials, maps session_id to Credentials object
-_SESSION_CREDENTIALS_CACHE: Dict[str, Credentials] = {}
+# Bounded and expiring 30 minutes after last access (like the Redis session key) so
+# abandoned sessions don't leak
+_SESSION_CREDENTIALS_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=1800)
+_SESSION_CREDENTIALS_CACHE_LOCK = threading.Lock()
+# Parsed single-user credential files, maps file path to (mtime, Credentials)
+_FILE_CREDENTIALS_CACHE: Dict[str, Tuple[float, Credentials]] = {}
+# Directories already created by this process, so makedirs runs once per path
+_ENSURED_DIRS: set[Path] = set()
+# Create the default directory once at import; helpers then skip the filesystem check
+try:
+    os.makedirs(DEFAULT_CREDENTIALS_DIR, exist_ok=True)
+    _ENSURED_DIRS.add(DEFAULT_CREDENTIALS_DIR)
+except OSError as e:
+    logger.warning(f"Could not create credentials directory {DEFAULT_CREDENTIALS_DIR}: {e}")
+# Credentials already built from Redis, keyed by session_id or (user_email, client_id)
+_CREDENTIALS_TTL_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=300)
+_CREDENTIALS_TTL_CACHE_LOCK = threading.Lock()
+
+# Shared transport for token refreshes so connections to Google's token endpoint are
+# kept alive across refreshes instead of a new Session (and TLS handshake) per refresh
+_REFRESH_REQUEST = Request(session=requests.Session())
+
 # Centralized Client Secrets Path Logic
 _client_secrets_env = os.getenv("GOOGLE_CLIENT_SECRET_PATH") or os.getenv(
     "GOOGLE_CLIENT_SECRETS"
@@ -56,11 +89,162 @@ else:
         "client_secret.json",
     )
 
+
+def _read_oauth_env() -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Reads the OAuth client settings from the environment."""
+    return (
+        os.getenv("GOOGLE_OAUTH_CLIENT_ID"),
+        os.getenv("GOOGLE_OAUTH_CLIENT_SECRET"),
+        os.getenv("GOOGLE_OAUTH_REDIRECT_URI"),
+    )
+
+
+# OAuth client settings are snapshotted once; see reset_client_secrets_cache()
+_ENV_CLIENT_ID, _ENV_CLIENT_SECRET, _ENV_REDIRECT_URI = _read_oauth_env()
+
+_LOCAL_REDIRECT_RE = re.compile(r"localhost|127\.0\.0\.1")
+
+
+@functools.lru_cache(maxsize=16)
+def _is_local_redirect_uri(redirect_uri: str) -> bool:
+    """Checks whether a redirect URI points at the local machine."""
+    return _LOCAL_REDIRECT_RE.search(redirect_uri) is not None
+
+
+# Local development redirects over plain HTTP need oauthlib's insecure transport flag
+if _is_local_redirect_uri(
+    _ENV_REDIRECT_URI or os.getenv("WORKSPACE_MCP_BASE_URI", "http://localhost")
+):
+    os.environ.setdefault("OAUTHLIB_INSECURE_TRANSPORT", "1")
+
 # --- Helper Functions ---
 
 
+def _json_dumps(data: Dict[str, Any]) -> bytes:
+    """Serializes a credentials payload to UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Fields of the credentials payload written by the save_* functions
+_CRED_FIELDS = ("token", "refresh_token", "token_uri", "client_id", "client_secret", "scopes")
+_cred_getter = operator.itemgetter(*_CRED_FIELDS)
+
+
+def _expiry_to_timestamp(expiry: Optional[datetime]) -> Optional[float]:
+    """Converts a naive UTC Credentials.expiry to epoch seconds for storage."""
+    if expiry is None:
+        return None
+    return expiry.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _expiry_from_payload(value: Any) -> Optional[datetime]:
+    """Parses a stored expiry back into the naive UTC datetime google-auth expects."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    # Payloads saved before expiry was stored as epoch seconds hold an ISO string;
+    # they are rewritten in the new format on their next save
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Could not parse expiry time {value!r}: {e}")
+        return None
+
+
+def _credentials_from_data(
+    creds_data: Dict[str, Any], expiry: Optional[datetime] = None
+) -> Credentials:
+    """Builds Credentials from a stored payload."""
+    try:
+        token, refresh_token, token_uri, client_id, client_secret, scopes = _cred_getter(creds_data)
+    except KeyError:
+        # Payloads from other writers may omit fields; treat missing ones as None
+        token, refresh_token, token_uri, client_id, client_secret, scopes = map(
+            creds_data.get, _CRED_FIELDS
+        )
+    return Credentials(
+        token=token,
+        refresh_token=refresh_token,
+        token_uri=token_uri,
+        client_id=client_id,
+        client_secret=client_secret,
+        scopes=scopes,
+        expiry=expiry,
+    )
+
+
+def _serialize_credentials(credentials: Credentials) -> bytes:
+    """Serializes Credentials into the JSON payload stored in Redis."""
+    return _json_dumps({
+        "token": credentials.token,
+        "refresh_token": credentials.refresh_token,
+        "token_uri": credentials.token_uri,
+        "client_id": credentials.client_id,
+        "client_secret": credentials.client_secret,
+        "scopes": credentials.scopes,
+        "expiry": _expiry_to_timestamp(credentials.expiry),
+    })
+
+
+def _deserialize_credentials(creds_json: Union[str, bytes]) -> Credentials:
+    """
+    Builds Credentials from a JSON payload written by _serialize_credentials.
+
+    Raises:
+        json.JSONDecodeError: If the payload is not valid JSON.
+    """
+    creds_data = _json_loads(creds_json)
+    return _credentials_from_data(creds_data, _expiry_from_payload(creds_data.get("expiry")))
+
+
+def _utcnow() -> datetime:
+    """Returns the current time as a naive UTC datetime, matching Credentials.expiry."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _get_cached_credentials(key: Union[str, Tuple[str, str]]) -> Optional[Credentials]:
+    """Returns cached Credentials for the key, dropping the entry if the token has expired."""
+    with _CREDENTIALS_TTL_CACHE_LOCK:
+        credentials = _CREDENTIALS_TTL_CACHE.get(key)
+        if credentials is not None and credentials.expiry and credentials.expiry < _utcnow():
+            del _CREDENTIALS_TTL_CACHE[key]
+            return None
+    return credentials
+
+
+def _cache_credentials(key: Union[str, Tuple[str, str]], credentials: Credentials) -> None:
+    """Stores Credentials in the in-process cache."""
+    with _CREDENTIALS_TTL_CACHE_LOCK:
+        _CREDENTIALS_TTL_CACHE[key] = credentials
+
+
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+
+def _read_file_bytes(path: str) -> bytes:
+    """
+    Reads a file as raw bytes, skipping the atime update where the platform allows it.
+
+    O_NOATIME is Linux-only and refused with EPERM for files the process doesn't own,
+    in which case the file is reopened normally.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | _O_NOATIME)
+    except PermissionError:
+        if not _O_NOATIME:
+            raise
+        fd = os.open(path, os.O_RDONLY)
+    with os.fdopen(fd, "rb") as f:
+        return f.read()
+
+
 def _find_any_credentials(
-    base_dir: str = DEFAULT_CREDENTIALS_DIR,
+    base_dir: Path = DEFAULT_CREDENTIALS_DIR,
 ) -> Optional[Credentials]:
     """
     Find and load any valid credentials from the credentials directory.
@@ -69,25 +253,29 @@ def _find_any_credentials(
     Returns:
         First valid Credentials object found, or None if none exist.
     """
-    if not os.path.exists(base_dir):
+    try:
+        entries = os.scandir(base_dir)
+    except FileNotFoundError:
         logger.info(f"[single-user] Credentials directory not found: {base_dir}")
         return None
 
     # Scan for any .json credential files
-    for filename in os.listdir(base_dir):
-        if filename.endswith(".json"):
-            filepath = os.path.join(base_dir, filename)
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            filepath = entry.path
             try:
-                with open(filepath, "r") as f:
-                    creds_data = json.load(f)
-                credentials = Credentials(
-                    token=creds_data.get("token"),
-                    refresh_token=creds_data.get("refresh_token"),
-                    token_uri=creds_data.get("token_uri"),
-                    client_id=creds_data.get("client_id"),
-                    client_secret=creds_data.get("client_secret"),
-                    scopes=creds_data.get("scopes"),
-                )
+                mtime = entry.stat().st_mtime
+                cached = _FILE_CREDENTIALS_CACHE.get(filepath)
+                if cached and cached[0] == mtime:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[single-user] Using cached credentials from %s", filepath)
+                    return cached[1]
+
+                creds_data = _json_loads(_read_file_bytes(filepath))
+                credentials = _credentials_from_data(creds_data)
+                _FILE_CREDENTIALS_CACHE[filepath] = (mtime, credentials)
                 logger.info(f"[single-user] Found credentials in {filepath}")
                 return credentials
             except (IOError, json.JSONDecodeError, KeyError) as e:
@@ -101,69 +289,99 @@ def _find_any_credentials(
 
 
 def _get_user_credential_path(
-    user_google_email: str, base_dir: str = DEFAULT_CREDENTIALS_DIR
-) -> str:
+    user_google_email: str, base_dir: Path = DEFAULT_CREDENTIALS_DIR
+) -> Path:
     """Constructs the path to a user's credential file."""
-    if not os.path.exists(base_dir):
-        os.makedirs(base_dir)
-        logger.info(f"Created credentials directory: {base_dir}")
-    return os.path.join(base_dir, f"{user_google_email}.json")
+    if not isinstance(base_dir, Path):
+        base_dir = Path(base_dir)
+    if base_dir not in _ENSURED_DIRS:
+        os.makedirs(base_dir, exist_ok=True)
+        _ENSURED_DIRS.add(base_dir)
+        logger.info(f"Ensured credentials directory exists: {base_dir}")
+    return base_dir / f"{user_google_email}.json"
 
 
-def save_credentials_to_file(
+async def save_credentials_to_file(
     user_google_email: str,
     credentials: Credentials,
-    base_dir: str = DEFAULT_CREDENTIALS_DIR,
+    base_dir: Path = DEFAULT_CREDENTIALS_DIR,
+    keep_ttl: bool = False,
 ):
-    """Saves user credentials to Redis (replaces file storage)."""
+    """
+    Saves user credentials to Redis (replaces file storage).
+
+    With keep_ttl, the stored entry keeps its remaining idle TTL and is not recreated
+    if it has already expired.
+    """
     if not credentials.client_id:
         logger.error(f"Cannot save credentials for {user_google_email}: missing client_id")
         return
-        
-    creds_data = {
-        "token": credentials.token,
-        "refresh_token": credentials.refresh_token,
-        "token_uri": credentials.token_uri,
-        "client_id": credentials.client_id,
-        "client_secret": credentials.client_secret,
-        "scopes": credentials.scopes,
-        "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
-    }
-    
+
+    _cache_credentials((user_google_email, credentials.client_id), credentials)
+    _clear_refresh_failure((user_google_email, credentials.client_id))
     redis_store = get_redis_store()
-    if redis_store.store_user_credentials(
+    if await redis_store.store_user_credentials(
         user_google_email, 
         credentials.client_id, 
-        json.dumps(creds_data)
+        _serialize_credentials(credentials),
+        keep_ttl=keep_ttl,
     ):
         logger.info(f"Credentials saved for user {user_google_email} to Redis")
     else:
         logger.error(f"Failed to save credentials for user {user_google_email} to Redis")
 
 
-def save_credentials_to_session(session_id: str, credentials: Credentials):
+async def save_credentials_to_session(session_id: str, credentials: Credentials):
     """Saves user credentials to Redis session cache."""
-    creds_data = {
-        "token": credentials.token,
-        "refresh_token": credentials.refresh_token,
-        "token_uri": credentials.token_uri,
-        "client_id": credentials.client_id,
-        "client_secret": credentials.client_secret,
-        "scopes": credentials.scopes,
-        "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
-    }
-    
+    _cache_credentials(session_id, credentials)
+    _clear_refresh_failure((session_id, credentials.client_id or ""))
     redis_store = get_redis_store()
-    if redis_store.store_session_credentials(session_id, json.dumps(creds_data)):
-        logger.debug(f"Credentials saved to Redis session cache for session_id: {session_id}")
+    if await redis_store.store_session_credentials(session_id, _serialize_credentials(credentials)):
+        logger.debug("Credentials saved to Redis session cache for session_id: %s", session_id)
     else:
         # Fallback to in-memory cache
-        _SESSION_CREDENTIALS_CACHE[session_id] = credentials
-        logger.debug(f"Credentials saved to in-memory cache for session_id: {session_id}")
+        with _SESSION_CREDENTIALS_CACHE_LOCK:
+            _SESSION_CREDENTIALS_CACHE[session_id] = credentials
+        logger.debug("Credentials saved to in-memory cache for session_id: %s", session_id)
 
 
-def load_credentials_from_file(
-    user_google_email: str, base_dir: str = DEFAULT_CREDENTIALS_DIR, 
+async def save_credentials_combined(
+    user_google_email: str,
+    session_id: Optional[str],
+    credentials: Credentials,
+):
+    """Saves user credentials and, if session_id is set, session credentials in one Redis round-trip."""
+    if not credentials.client_id:
+        logger.error(f"Cannot save credentials for {user_google_email}: missing client_id")
+        if session_id:
+            await save_credentials_to_session(session_id, credentials)
+        return
+
+    _cache_credentials((user_google_email, credentials.client_id), credentials)
+    _clear_refresh_failure((user_google_email, credentials.client_id))
+    if session_id:
+        _cache_credentials(session_id, credentials)
+        _clear_refresh_failure((session_id, credentials.client_id))
+
+    redis_store = get_redis_store()
+    if await redis_store.store_credentials(
+        user_google_email,
+        credentials.client_id,
+        session_id,
+        _serialize_credentials(credentials),
+    ):
+        logger.info(f"Credentials saved for user {user_google_email} to Redis")
+    else:
+        logger.error(f"Failed to save credentials for user {user_google_email} to Redis")
+        if session_id:
+            # Fallback to in-memory cache
+            with _SESSION_CREDENTIALS_CACHE_LOCK:
+                _SESSION_CREDENTIALS_CACHE[session_id] = credentials
+            logger.debug("Credentials saved to in-memory cache for session_id: %s", session_id)
+
+
+async def load_credentials_from_file(
+    user_google_email: str, base_dir: Path = DEFAULT_CREDENTIALS_DIR, 
     client_id: Optional[str] = None
 ) -> Optional[Credentials]:
     """Loads user credentials from Redis (replaces file storage)."""
@@ -172,9 +390,14 @@ def load_credentials_from_file(
             f"Cannot load credentials for {user_google_email}: no client_id provided"
         )
         return None
-        
+
+    cached = _get_cached_credentials((user_google_email, client_id))
+    if cached is not None:
+        logger.debug("Credentials loaded for user %s from in-process cache", user_google_email)
+        return cached
+
     redis_store = get_redis_store()
-    creds_json = redis_store.get_user_credentials(user_google_email, client_id)
+    creds_json = await redis_store.get_user_credentials(user_google_email, client_id)
     
     if not creds_json:
         logger.info(
@@ -183,30 +406,9 @@ def load_credentials_from_file(
         return None
 
     try:
-        creds_data = json.loads(creds_json)
-
-        # Parse expiry if present
-        expiry = None
-        if creds_data.get("expiry"):
-            try:
-                expiry = datetime.fromisoformat(creds_data["expiry"])
-            except (ValueError, TypeError) as e:
-                logger.warning(
-                    f"Could not parse expiry time for {user_google_email}: {e}"
-                )
-
-        credentials = Credentials(
-            token=creds_data.get("token"),
-            refresh_token=creds_data.get("refresh_token"),
-            token_uri=creds_data.get("token_uri"),
-            client_id=creds_data.get("client_id"),
-            client_secret=creds_data.get("client_secret"),
-            scopes=creds_data.get("scopes"),
-            expiry=expiry,
-        )
-        logger.debug(
-            f"Credentials loaded for user {user_google_email} from Redis"
-        )
+        credentials = _deserialize_credentials(creds_json)
+        _cache_credentials((user_google_email, client_id), credentials)
+        logger.debug("Credentials loaded for user %s from Redis", user_google_email)
         return credentials
     except (json.JSONDecodeError, KeyError) as e:
         logger.error(
@@ -215,53 +417,131 @@ def load_credentials_from_file(
         return None
 
 
-def load_credentials_from_session(session_id: str) -> Optional[Credentials]:
+async def load_credentials_bulk(
+    users: List[Tuple[str, str]],
+    cache_results: bool = True,
+) -> Dict[Tuple[str, str], Credentials]:
+    """
+    Loads credentials for many users with a single Redis round-trip.
+
+    Args:
+        users: List of (user_email, client_id) tuples.
+        cache_results: Add credentials read from Redis to the in-process cache. Pass
+            False for background scans so they don't evict entries for active users.
+
+    Returns:
+        Dict mapping each (user_email, client_id) found to its Credentials.
+    """
+    loaded: Dict[Tuple[str, str], Credentials] = {}
+    missing: List[Tuple[str, str]] = []
+    for user in users:
+        cached = _get_cached_credentials(user)
+        if cached is not None:
+            loaded[user] = cached
+        else:
+            missing.append(user)
+    if not missing:
+        return loaded
+
+    redis_store = get_redis_store()
+    for user, creds_json in zip(missing, await redis_store.get_many_user_credentials(missing)):
+        if not creds_json:
+            continue
+        try:
+            credentials = _deserialize_credentials(creds_json)
+        except (json.JSONDecodeError, KeyError) as e:
+            logger.error(f"Error parsing credentials for user {user[0]}: {e}")
+            continue
+        if cache_results:
+            _cache_credentials(user, credentials)
+        loaded[user] = credentials
+
+    logger.debug("Loaded credentials for %d/%d users in bulk", len(loaded), len(users))
+    return loaded
+
+
+async def load_credentials_from_session(session_id: str) -> Optional[Credentials]:
     """Loads user credentials from Redis session cache."""
+    cached = _get_cached_credentials(session_id)
+    if cached is not None:
+        logger.debug("Credentials loaded from in-process cache for session_id: %s", session_id)
+        return cached
+
     # Try Redis first
     redis_store = get_redis_store()
-    creds_json = redis_store.get_session_credentials(session_id)
+    creds_json = await redis_store.get_session_credentials(session_id)
     
     if creds_json:
         try:
-            creds_data = json.loads(creds_json)
-            
-            # Parse expiry if present
-            expiry = None
-            if creds_data.get("expiry"):
-                try:
-                    expiry = datetime.fromisoformat(creds_data["expiry"])
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Could not parse expiry time: {e}")
-            
-            credentials = Credentials(
-                token=creds_data.get("token"),
-                refresh_token=creds_data.get("refresh_token"),
-                token_uri=creds_data.get("token_uri"),
-                client_id=creds_data.get("client_id"),
-                client_secret=creds_data.get("client_secret"),
-                scopes=creds_data.get("scopes"),
-                expiry=expiry,
-            )
+            credentials = _deserialize_credentials(creds_json)
+            _cache_credentials(session_id, credentials)
             logger.debug(
-                f"Credentials loaded from Redis session cache for session_id: {session_id}"
+                "Credentials loaded from Redis session cache for session_id: %s", session_id
             )
             return credentials
         except (json.JSONDecodeError, KeyError) as e:
             logger.error(f"Error parsing session credentials: {e}")
     
     # Fallback to in-memory cache
-    credentials = _SESSION_CREDENTIALS_CACHE.get(session_id)
+    with _SESSION_CREDENTIALS_CACHE_LOCK:
+        credentials = _SESSION_CREDENTIALS_CACHE.get(session_id)
+        if credentials is not None:
+            # Re-insert so the expiry slides on access, like the Redis session key's GETEX
+            _SESSION_CREDENTIALS_CACHE[session_id] = credentials
     if credentials:
         logger.debug(
-            f"Credentials loaded from in-memory cache for session_id: {session_id}"
+            "Credentials loaded from in-memory cache for session_id: %s", session_id
         )
     else:
-        logger.debug(
-            f"No credentials found for session_id: {session_id}"
-        )
+        logger.debug("No credentials found for session_id: %s", session_id)
     return credentials
 
 
+@functools.lru_cache(maxsize=32)
+def _build_client_config(
+    client_id: str, client_secret: str, redirect_uri: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Builds the client secrets config for a fixed set of OAuth settings.
+    The result is cached and shared between callers, so it must not be mutated.
+    """
+    # Create config structure that matches Google client secrets format
+    web_config = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+    }
+
+    # Add redirect_uri if provided
+    if redirect_uri:
+        web_config["redirect_uris"] = [redirect_uri]
+
+    # Return the full config structure expected by Google OAuth library
+    return {"web": web_config}
+
+
+@functools.lru_cache(maxsize=8)
+def _load_file_secrets_cached(path: str, mtime: float) -> Dict[str, Any]:
+    """Parses a client secrets file. Keyed on mtime so edits invalidate the cache."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _load_file_secrets(path: str) -> Dict[str, Any]:
+    """Loads a client secrets file, reusing the parsed contents while it is unchanged."""
+    return _load_file_secrets_cached(path, os.stat(path).st_mtime)
+
+
+def reset_client_secrets_cache() -> None:
+    """Re-reads the OAuth environment variables and drops all cached client configs."""
+    global _ENV_CLIENT_ID, _ENV_CLIENT_SECRET, _ENV_REDIRECT_URI
+    _ENV_CLIENT_ID, _ENV_CLIENT_SECRET, _ENV_REDIRECT_URI = _read_oauth_env()
+    _build_client_config.cache_clear()
+    _load_file_secrets_cached.cache_clear()
+
+
 def load_client_secrets_from_env(
     client_id: Optional[str] = None,
     client_secret: Optional[str] = None,
@@ -291,27 +571,14 @@ def load_client_secrets_from_env(
         logger.info(f"[OAuth] Using provided client_secret: ****** (hidden for security)")
     
     # Use provided parameters first, fall back to environment variables
-    final_client_id = client_id or os.getenv("GOOGLE_OAUTH_CLIENT_ID")
-    final_client_secret = client_secret or os.getenv("GOOGLE_OAUTH_CLIENT_SECRET")
-    final_redirect_uri = redirect_uri or os.getenv("GOOGLE_OAUTH_REDIRECT_URI")
+    final_client_id = client_id or _ENV_CLIENT_ID
+    final_client_secret = client_secret or _ENV_CLIENT_SECRET
+    final_redirect_uri = redirect_uri or _ENV_REDIRECT_URI
 
     if final_client_id and final_client_secret:
-        # Create config structure that matches Google client secrets format
-        web_config = {
-            "client_id": final_client_id,
-            "client_secret": final_client_secret,
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        }
-
-        # Add redirect_uri if provided
-        if final_redirect_uri:
-            web_config["redirect_uris"] = [final_redirect_uri]
-
-        # Return the full config structure expected by Google OAuth library
-        config = {"web": web_config}
-
+        config = _build_client_config(
+            final_client_id, final_client_secret, final_redirect_uri
+        )
         logger.info("Loaded OAuth client credentials")
         return config
 
@@ -354,24 +621,23 @@ def load_client_secrets(
 
     # Fall back to loading from file
     try:
-        with open(client_secrets_path, "r") as f:
-            client_config = json.load(f)
-            # The file usually contains a top-level key like "web" or "installed"
-            if "web" in client_config:
-                logger.info(
-                    f"Loaded OAuth client credentials from file: {client_secrets_path}"
-                )
-                return client_config["web"]
-            elif "installed" in client_config:
-                logger.info(
-                    f"Loaded OAuth client credentials from file: {client_secrets_path}"
-                )
-                return client_config["installed"]
-            else:
-                logger.error(
-                    f"Client secrets file {client_secrets_path} has unexpected format."
-                )
-                raise ValueError("Invalid client secrets file format")
+        client_config = _load_file_secrets(client_secrets_path)
+        # The file usually contains a top-level key like "web" or "installed"
+        if "web" in client_config:
+            logger.info(
+                f"Loaded OAuth client credentials from file: {client_secrets_path}"
+            )
+            return client_config["web"]
+        elif "installed" in client_config:
+            logger.info(
+                f"Loaded OAuth client credentials from file: {client_secrets_path}"
+            )
+            return client_config["installed"]
+        else:
+            logger.error(
+                f"Client secrets file {client_secrets_path} has unexpected format."
+            )
+            raise ValueError("Invalid client secrets file format")
     except (IOError, json.JSONDecodeError) as e:
         logger.error(f"Error loading client secrets file {client_secrets_path}: {e}")
         raise
@@ -432,13 +698,15 @@ def create_oauth_flow(
         return flow
 
     # Fall back to file-based config
-    if not os.path.exists(CONFIG_CLIENT_SECRETS_PATH):
+    try:
+        file_config = _load_file_secrets(CONFIG_CLIENT_SECRETS_PATH)
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"OAuth client secrets file not found at {CONFIG_CLIENT_SECRETS_PATH} and no credentials provided"
         )
 
-    flow = Flow.from_client_secrets_file(
-        CONFIG_CLIENT_SECRETS_PATH,
+    flow = Flow.from_client_config(
+        file_config,
         scopes=scopes,
         redirect_uri=redirect_uri,
         state=state,
@@ -451,6 +719,31 @@ def create_oauth_flow(
 
 # --- Core OAuth Logic ---
 
+_AUTH_MSG_HEADER = (
+    "**ACTION REQUIRED: Google Authentication Needed for {user_display_name}**\n\n"
+    "To proceed, the user must authorize this application for {service_name} access using all required permissions.\n"
+    "**LLM, please present this exact authorization URL to the user as a clickable hyperlink:**\n"
+    "Authorization URL: {auth_url}\n"
+    "Markdown for hyperlink: [Click here to authorize {service_name} access]({auth_url})\n\n"
+    "**LLM, after presenting the link, instruct the user as follows:**\n"
+    "1. Click the link and complete the authorization in their browser.\n"
+)
+_AUTH_MSG_FOOTER = (
+    "\n\nThe application will use the new credentials. If '{user_google_email}' was provided, it must match the authenticated account."
+)
+_AUTH_MSG_WITHOUT_EMAIL = (
+    _AUTH_MSG_HEADER
+    + "2. After successful authorization{session_info}, the browser page will display the authenticated email address.\n"
+    + "   **LLM: Instruct the user to provide you with this email address.**\n"
+    + "3. Once you have the email, **retry their original command, ensuring you include this `user_google_email`.**"
+    + _AUTH_MSG_FOOTER
+)
+_AUTH_MSG_WITH_EMAIL = (
+    _AUTH_MSG_HEADER
+    + "2. After successful authorization{session_info}, **retry their original command**."
+    + _AUTH_MSG_FOOTER
+)
+
 
 async def start_auth_flow(
     mcp_session_id: Optional[str],
@@ -493,24 +786,25 @@ async def start_auth_flow(
     )
 
     try:
-        if "OAUTHLIB_INSECURE_TRANSPORT" not in os.environ and (
-            "localhost" in redirect_uri or "127.0.0.1" in redirect_uri
-        ):  # Use passed redirect_uri
+        # Normally set at import; only a non-default local redirect_uri gets here
+        if "OAUTHLIB_INSECURE_TRANSPORT" not in os.environ and _is_local_redirect_uri(
+            redirect_uri
+        ):
             logger.warning(
                 "OAUTHLIB_INSECURE_TRANSPORT not set. Setting it for localhost/local development."
             )
             os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
-        oauth_state = os.urandom(16).hex()
+        oauth_state = secrets.token_hex(16)
         
         # Store OAuth state with Redis fallback
-        store_oauth_state(oauth_state, mcp_session_id, client_id, client_secret)
+        await store_oauth_state(oauth_state, mcp_session_id, client_id, client_secret)
         logger.info(
             f"[start_auth_flow] Stored OAuth state '{oauth_state}' with session_id '{mcp_session_id}'"
         )
 
         flow = create_oauth_flow(
-            scopes=SCOPES,  # Use global SCOPES
+            scopes=SCOPES_LIST,  # Use global SCOPES
             redirect_uri=redirect_uri,  # Use passed redirect_uri
             state=oauth_state,
             client_id=client_id,
@@ -522,38 +816,21 @@ async def start_auth_flow(
             f"Auth flow started for {user_display_name}. State: {oauth_state}. Advise user to visit: {auth_url}"
         )
 
-        message_lines = [
-            f"**ACTION REQUIRED: Google Authentication Needed for {user_display_name}**\n",
-            f"To proceed, the user must authorize this application for {service_name} access using all required permissions.",
-            "**LLM, please present this exact authorization URL to the user as a clickable hyperlink:**",
-            f"Authorization URL: {auth_url}",
-            f"Markdown for hyperlink: [Click here to authorize {service_name} access]({auth_url})\n",
-            "**LLM, after presenting the link, instruct the user as follows:**",
-            "1. Click the link and complete the authorization in their browser.",
-        ]
         session_info_for_llm = (
             f" (this will link to your current session {mcp_session_id})"
             if mcp_session_id
             else ""
         )
-
-        if not initial_email_provided:
-            message_lines.extend(
-                [
-                    f"2. After successful authorization{session_info_for_llm}, the browser page will display the authenticated email address.",
-                    "   **LLM: Instruct the user to provide you with this email address.**",
-                    "3. Once you have the email, **retry their original command, ensuring you include this `user_google_email`.**",
-                ]
-            )
-        else:
-            message_lines.append(
-                f"2. After successful authorization{session_info_for_llm}, **retry their original command**."
-            )
-
-        message_lines.append(
-            f"\nThe application will use the new credentials. If '{user_google_email}' was provided, it must match the authenticated account."
+        template = (
+            _AUTH_MSG_WITH_EMAIL if initial_email_provided else _AUTH_MSG_WITHOUT_EMAIL
+        )
+        return template.format(
+            user_display_name=user_display_name,
+            service_name=service_name,
+            auth_url=auth_url,
+            session_info=session_info_for_llm,
+            user_google_email=user_google_email,
         )
-        return "\n".join(message_lines)
 
     except FileNotFoundError as e:
         error_text = f"OAuth client credentials not found: {e}. Please either:\n1. Set environment variables: GOOGLE_OAUTH_CLIENT_ID and GOOGLE_OAUTH_CLIENT_SECRET\n2. Ensure '{CONFIG_CLIENT_SECRETS_PATH}' file exists"
@@ -568,11 +845,11 @@ async def start_auth_flow(
         raise Exception(error_text)
 
 
-def handle_auth_callback(
+async def handle_auth_callback(
     scopes: List[str],
     authorization_response: str,
     redirect_uri: str,
-    credentials_base_dir: str = DEFAULT_CREDENTIALS_DIR,
+    credentials_base_dir: Path = DEFAULT_CREDENTIALS_DIR,
     session_id: Optional[str] = None,
     client_secrets_path: Optional[
         str
@@ -626,12 +903,12 @@ def handle_auth_callback(
 
         # Exchange the authorization code for credentials
         # Note: fetch_token will use the redirect_uri configured in the flow
-        flow.fetch_token(authorization_response=authorization_response)
+        await asyncio.to_thread(flow.fetch_token, authorization_response=authorization_response)
         credentials = flow.credentials
         logger.info("Successfully exchanged authorization code for tokens.")
 
         # Get user info to determine user_id (using email here)
-        user_info = get_user_info(credentials)
+        user_info = await asyncio.to_thread(get_user_info, credentials)
         if not user_info or "email" not in user_info:
             logger.error("Could not retrieve user email from Google.")
             raise ValueError("Failed to get user email for identification.")
@@ -639,12 +916,8 @@ def handle_auth_callback(
         user_google_email = user_info["email"]
         logger.info(f"Identified user_google_email: {user_google_email}")
 
-        # Save the credentials to file
-        save_credentials_to_file(user_google_email, credentials, credentials_base_dir)
-
-        # If session_id is provided, also save to session cache
-        if session_id:
-            save_credentials_to_session(session_id, credentials)
+        # Save the user credentials, and the session credentials if session_id is provided
+        await save_credentials_combined(user_google_email, session_id, credentials)
 
         return user_google_email, credentials
 
@@ -653,14 +926,47 @@ def handle_auth_callback(
         raise  # Re-raise for the caller
 
 
-def get_credentials(
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+_BACKGROUND_TASKS: set = set()
+
+
+def _on_background_task_done(task: asyncio.Task) -> None:
+    _BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task failed", exc_info=task.exception())
+
+
+def _run_in_background(coro: Awaitable[Any]) -> None:
+    """Schedules a coroutine on the running loop without awaiting it."""
+    task = asyncio.ensure_future(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_on_background_task_done)
+
+
+async def _persist_refreshed_credentials(
+    user_google_email: Optional[str],
+    session_id: Optional[str],
+    credentials: Credentials,
+    credentials_base_dir: Path = DEFAULT_CREDENTIALS_DIR,
+) -> None:
+    """Writes refreshed credentials to the user and session stores."""
+    if user_google_email:  # Always save to file if email is known
+        await save_credentials_to_file(
+            user_google_email, credentials, credentials_base_dir
+        )
+    if session_id:  # Update session cache if it was the source or is active
+        await save_credentials_to_session(session_id, credentials)
+
+
+async def get_credentials(
     user_google_email: Optional[str],  # Can be None if relying on session_id
     required_scopes: List[str],
     client_secrets_path: Optional[str] = None,
-    credentials_base_dir: str = DEFAULT_CREDENTIALS_DIR,
+    credentials_base_dir: Path = DEFAULT_CREDENTIALS_DIR,
     session_id: Optional[str] = None,
     provided_client_id: Optional[str] = None,
     provided_client_secret: Optional[str] = None,
+    skip_save: bool = False,
 ) -> Optional[Credentials]:
     """
     Retrieves stored credentials, prioritizing session, then file. Refreshes if necessary.
@@ -675,16 +981,19 @@ def get_credentials(
         session_id: Optional MCP session ID.
         provided_client_id: OAuth client ID provided by the tenant.
         provided_client_secret: OAuth client secret provided by the tenant.
+        skip_save: Persist refreshed credentials in a background task instead of
+            before returning.
 
     Returns:
-        Valid Credentials object or None.
+        Valid Credentials object, or None if none are available, they lack the required
+        scopes, or they could not be refreshed.
     """
     # Check for single-user mode
     if os.getenv("MCP_SINGLE_USER_MODE") == "1":
         logger.info(
             f"[get_credentials] Single-user mode: bypassing session mapping, finding any credentials"
         )
-        credentials = _find_any_credentials(credentials_base_dir)
+        credentials = await asyncio.to_thread(_find_any_credentials, credentials_base_dir)
         if not credentials:
             logger.info(
                 f"[get_credentials] Single-user mode: No credentials found in {credentials_base_dir}"
@@ -695,15 +1004,17 @@ def get_credentials(
         # This is needed for proper credential saving after refresh
         if not user_google_email and credentials.valid:
             try:
-                user_info = get_user_info(credentials)
+                user_info = await asyncio.to_thread(get_user_info, credentials)
                 if user_info and "email" in user_info:
                     user_google_email = user_info["email"]
                     logger.debug(
-                        f"[get_credentials] Single-user mode: extracted user email {user_google_email} from credentials"
+                        "[get_credentials] Single-user mode: extracted user email %s from credentials",
+                        user_google_email,
                     )
             except Exception as e:
                 logger.debug(
-                    f"[get_credentials] Single-user mode: could not extract user email: {e}"
+                    "[get_credentials] Single-user mode: could not extract user email: %s",
+                    e,
                 )
     else:
         credentials: Optional[Credentials] = None
@@ -713,19 +1024,23 @@ def get_credentials(
             logger.debug("[get_credentials] No session_id provided")
 
         logger.debug(
-            f"[get_credentials] Called for user_google_email: '{user_google_email}', session_id: '{session_id}', required_scopes: {required_scopes}"
+            "[get_credentials] Called for user_google_email: '%s', session_id: '%s', required_scopes: %s",
+            user_google_email,
+            session_id,
+            required_scopes,
         )
 
         if session_id:
-            credentials = load_credentials_from_session(session_id)
+            credentials = await load_credentials_from_session(session_id)
             if credentials:
                 logger.debug(
-                    f"[get_credentials] Loaded credentials from session for session_id '{session_id}'."
+                    "[get_credentials] Loaded credentials from session for session_id '%s'.",
+                    session_id,
                 )
 
         # MULTI-TENANT MODE: Try loading from Redis if we have client_id
         if not credentials and user_google_email and provided_client_id:
-            credentials = load_credentials_from_file(
+            credentials = await load_credentials_from_file(
                 user_google_email, 
                 credentials_base_dir, 
                 provided_client_id
@@ -736,7 +1051,7 @@ def get_credentials(
                 )
                 # Cache in session if we have a session_id
                 if session_id:
-                    save_credentials_to_session(session_id, credentials)
+                    await save_credentials_to_session(session_id, credentials)
 
         if not credentials:
             logger.info(
@@ -745,22 +1060,29 @@ def get_credentials(
             return None
 
     logger.debug(
-        f"[get_credentials] Credentials found. Scopes: {credentials.scopes}, Valid: {credentials.valid}, Expired: {credentials.expired}"
+        "[get_credentials] Credentials found. Scopes: %s, Valid: %s, Expired: %s",
+        credentials.scopes,
+        credentials.valid,
+        credentials.expired,
     )
 
-    if not all(scope in credentials.scopes for scope in required_scopes):
+    if not frozenset(required_scopes).issubset(credentials.scopes or ()):
         logger.warning(
             f"[get_credentials] Credentials lack required scopes. Need: {required_scopes}, Have: {credentials.scopes}. User: '{user_google_email}', Session: '{session_id}'"
         )
         return None  # Re-authentication needed for scopes
 
     logger.debug(
-        f"[get_credentials] Credentials have sufficient scopes. User: '{user_google_email}', Session: '{session_id}'"
+        "[get_credentials] Credentials have sufficient scopes. User: '%s', Session: '%s'",
+        user_google_email,
+        session_id,
     )
 
     if credentials.valid:
         logger.debug(
-            f"[get_credentials] Credentials are valid. User: '{user_google_email}', Session: '{session_id}'"
+            "[get_credentials] Credentials are valid. User: '%s', Session: '%s'",
+            user_google_email,
+            session_id,
         )
         return credentials
     elif credentials.expired and credentials.refresh_token:
@@ -772,24 +1094,58 @@ def get_credentials(
                 "[get_credentials] Client secrets path required for refresh but not provided."
             )
             return None
+        # One refresh per user and client; concurrent callers wait and reuse the new token
+        lock_key = (user_google_email or session_id or "", credentials.client_id or "")
         try:
-            logger.debug(
-                f"[get_credentials] Refreshing token using client_secrets_path: {client_secrets_path}"
-            )
-            # client_config = load_client_secrets(client_secrets_path) # Not strictly needed if creds have client_id/secret
-            credentials.refresh(Request())
-            logger.info(
-                f"[get_credentials] Credentials refreshed successfully. User: '{user_google_email}', Session: '{session_id}'"
-            )
+            async with _get_refresh_lock(lock_key):
+                if credentials.valid:
+                    logger.debug(
+                        "[get_credentials] Credentials refreshed by a concurrent caller. User: '%s'",
+                        user_google_email,
+                    )
+                    return credentials
+                if user_google_email and provided_client_id:
+                    stored = await load_credentials_from_file(
+                        user_google_email,
+                        credentials_base_dir,
+                        provided_client_id,
+                    )
+                    if stored is not None and stored.valid:
+                        logger.debug(
+                            "[get_credentials] Using token refreshed by a concurrent caller. User: '%s'",
+                            user_google_email,
+                        )
+                        if session_id:
+                            await save_credentials_to_session(session_id, stored)
+                        return stored
 
-            # Save refreshed credentials
-            if user_google_email:  # Always save to file if email is known
-                save_credentials_to_file(
-                    user_google_email, credentials, credentials_base_dir
+                logger.debug(
+                    "[get_credentials] Refreshing token using client_secrets_path: %s",
+                    client_secrets_path,
                 )
-            if session_id:  # Update session cache if it was the source or is active
-                save_credentials_to_session(session_id, credentials)
-            return credentials
+                # client_config = load_client_secrets(client_secrets_path) # Not strictly needed if creds have client_id/secret
+                await asyncio.to_thread(credentials.refresh, _REFRESH_REQUEST)
+                logger.info(
+                    f"[get_credentials] Credentials refreshed successfully. User: '{user_google_email}', Session: '{session_id}'"
+                )
+
+                # Save refreshed credentials
+                if skip_save:
+                    # Update the in-process cache now so waiters on this lock see the new token
+                    if user_google_email and credentials.client_id:
+                        _cache_credentials((user_google_email, credentials.client_id), credentials)
+                    if session_id:
+                        _cache_credentials(session_id, credentials)
+                    _run_in_background(
+                        _persist_refreshed_credentials(
+                            user_google_email, session_id, credentials, credentials_base_dir
+                        )
+                    )
+                else:
+                    await _persist_refreshed_credentials(
+                        user_google_email, session_id, credentials, credentials_base_dir
+                    )
+                return credentials
         except RefreshError as e:
             logger.warning(
                 f"[get_credentials] RefreshError - token expired/revoked: {e}. User: '{user_google_email}', Session: '{session_id}'"
@@ -809,11 +1165,34 @@ def get_credentials(
         return None
 
 
+def get_credentials_cache_stats() -> Dict[str, Any]:
+    """Get in-memory credentials cache statistics."""
+    with _SESSION_CREDENTIALS_CACHE_LOCK:
+        session_entries = len(_SESSION_CREDENTIALS_CACHE)
+    with _CREDENTIALS_TTL_CACHE_LOCK:
+        cached_entries = len(_CREDENTIALS_TTL_CACHE)
+    with _RECENT_CREDENTIALS_CACHE_LOCK:
+        recent_entries = len(_RECENT_CREDENTIALS_CACHE)
+    return {
+        "session_entries": session_entries,
+        "session_max_entries": _SESSION_CREDENTIALS_CACHE.maxsize,
+        "session_ttl_seconds": _SESSION_CREDENTIALS_CACHE.ttl,
+        "cached_entries": cached_entries,
+        "cached_max_entries": _CREDENTIALS_TTL_CACHE.maxsize,
+        "cached_ttl_seconds": _CREDENTIALS_TTL_CACHE.ttl,
+        "recent_entries": recent_entries,
+    }
+
+
 def get_user_info(credentials: Credentials) -> Optional[Dict[str, Any]]:
     """Fetches basic user profile information (requires userinfo.email scope)."""
     if not credentials or not credentials.valid:
         logger.error("Cannot get user info: Invalid or missing credentials.")
         return None
+    # Imported lazily: googleapiclient is heavy and only needed once credentials exist
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+
     try:
         # Using googleapiclient discovery to get user info
         # Requires 'google-api-python-client' library
@@ -830,8 +1209,251 @@ def get_user_info(credentials: Credentials) -> Optional[Dict[str, Any]]:
         return None
 
 
+# --- Background Token Refresh ---
+
+# Tokens expiring within this window are refreshed ahead of time
+_REFRESH_AHEAD_WINDOW = timedelta(minutes=5)
+_REFRESH_SCAN_INTERVAL_SECONDS = 60
+# How long one instance claims a user's background refresh, so other instances
+# sharing the Redis store skip that user for the next couple of scans
+_REFRESH_CLAIM_TTL = timedelta(seconds=2 * _REFRESH_SCAN_INTERVAL_SECONDS)
+# Transient refresh failures (network, token endpoint) are retried after this long
+_REFRESH_RETRY_BACKOFF_SECONDS = 600
+
+_token_refresh_task: Optional[asyncio.Task] = None
+# Per-credential locks so the same token is never refreshed twice at once,
+# shared by the background refresher and get_credentials. Weakly held, so a lock
+# is dropped as soon as no task is holding or waiting on it.
+_refresh_locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+# Monotonic time before which the refresher skips a key after a failed refresh. Revoked
+# tokens are skipped until the credentials are saved again (e.g. after re-authentication),
+# or until the entry expires and they are retried once a day.
+_refresh_failures: TTLCache = TTLCache(maxsize=10_000, ttl=86400)
+
+
+def _get_refresh_lock(lock_key: Tuple[str, str]) -> asyncio.Lock:
+    """Returns the refresh lock for a credential key, creating it if needed."""
+    lock = _refresh_locks.get(lock_key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _refresh_locks[lock_key] = lock
+    return lock
+
+
+def _clear_refresh_failure(lock_key: Tuple[str, str]) -> None:
+    """Lets the background refresher retry a key once new credentials are saved for it."""
+    _refresh_failures.pop(lock_key, None)
+
+
+def _expires_soon(credentials: Credentials) -> bool:
+    """Checks whether refreshable credentials expire within the refresh-ahead window."""
+    if not credentials.expiry or not credentials.refresh_token:
+        return False
+    return credentials.expiry - _utcnow() < _REFRESH_AHEAD_WINDOW
+
+
+async def _refresh_ahead(
+    lock_key: Tuple[str, str],
+    credentials: Credentials,
+    persist: Callable[[Credentials], Awaitable[None]],
+) -> None:
+    """Refreshes credentials off the event loop and persists the new token."""
+    if _refresh_failures.get(lock_key, 0.0) > time.monotonic():
+        return  # Backing off after a failed refresh
+    lock = _get_refresh_lock(lock_key)
+    if lock.locked():
+        return  # Another task is already refreshing this token
+    async with lock:
+        if not _expires_soon(credentials):
+            return
+        try:
+            await asyncio.to_thread(credentials.refresh, _REFRESH_REQUEST)
+        except RefreshError as e:
+            # Revoked or expired grant; retrying can't succeed until the user re-authenticates
+            _refresh_failures[lock_key] = float("inf")
+            logger.warning(f"[token-refresh] Could not refresh token for {lock_key[0]}: {e}")
+            return
+        except GoogleAuthError as e:
+            _refresh_failures[lock_key] = time.monotonic() + _REFRESH_RETRY_BACKOFF_SECONDS
+            logger.warning(
+                f"[token-refresh] Token refresh failed for {lock_key[0]}, retrying in "
+                f"{_REFRESH_RETRY_BACKOFF_SECONDS}s: {e}"
+            )
+            return
+        try:
+            await persist(credentials)
+        except Exception as e:
+            logger.error(
+                f"[token-refresh] Could not persist refreshed token for {lock_key[0]}: {e}",
+                exc_info=True,
+            )
+            return
+        logger.info(f"[token-refresh] Refreshed token ahead of expiry for {lock_key[0]}")
+
+
+async def _refresh_expiring_credentials() -> None:
+    """Refreshes every known token that is about to expire."""
+    with _SESSION_CREDENTIALS_CACHE_LOCK:
+        sessions = list(_SESSION_CREDENTIALS_CACHE.items())
+    for session_id, credentials in sessions:
+        if _expires_soon(credentials):
+            await _refresh_ahead(
+                (session_id, credentials.client_id or ""),
+                credentials,
+                functools.partial(save_credentials_to_session, session_id),
+            )
+
+    redis_store = get_redis_store()
+    async for users in redis_store.scan_user_credentials():
+        loaded = await load_credentials_bulk(users, cache_results=False)
+        for (user_email, client_id), credentials in loaded.items():
+            if not _expires_soon(credentials):
+                continue
+            if not await redis_store.acquire_refresh_lock(user_email, client_id, _REFRESH_CLAIM_TTL):
+                continue  # Another instance is refreshing this user
+            await _refresh_ahead(
+                (user_email, client_id),
+                credentials,
+                # Keep the stored TTL so refreshing ahead doesn't keep idle users alive
+                functools.partial(save_credentials_to_file, user_email, keep_ttl=True),
+            )
+
+
+async def _token_refresh_loop() -> None:
+    """Periodically refreshes tokens before they expire."""
+    while True:
+        try:
+            await _refresh_expiring_credentials()
+        except Exception as e:
+            logger.error(f"[token-refresh] Background refresh pass failed: {e}", exc_info=True)
+        await asyncio.sleep(_REFRESH_SCAN_INTERVAL_SECONDS)
+
+
+def _ensure_token_refresher() -> None:
+    """Starts the background token refresher on the running event loop if needed."""
+    global _token_refresh_task
+    if _token_refresh_task is not None and not _token_refresh_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Not called from an event loop
+    _token_refresh_task = loop.create_task(_token_refresh_loop())
+    logger.info("[token-refresh] Started background token refresher")
+
+
+# --- Coalesced Credential Lookups ---
+
+# In-flight get_credentials calls, shared by concurrent callers with the same key
+_INFLIGHT_CREDENTIALS: Dict[Tuple[Any, ...], asyncio.Task] = {}
+
+
+async def _get_credentials_coalesced(
+    user_google_email: Optional[str],
+    required_scopes: List[str],
+    client_secrets_path: Optional[str] = None,
+    session_id: Optional[str] = None,
+    provided_client_id: Optional[str] = None,
+    provided_client_secret: Optional[str] = None,
+    skip_save: bool = False,
+) -> Optional[Credentials]:
+    """
+    Runs get_credentials single-flighted per user, tenant and scopes.
+    Concurrent callers for the same key await one shared lookup (and refresh) instead
+    of each hitting Redis and Google's token endpoint.
+    """
+    key = (user_google_email, provided_client_id, session_id, frozenset(required_scopes))
+    task = _INFLIGHT_CREDENTIALS.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            get_credentials(
+                user_google_email=user_google_email,
+                required_scopes=required_scopes,
+                client_secrets_path=client_secrets_path,
+                session_id=session_id,
+                provided_client_id=provided_client_id,
+                provided_client_secret=provided_client_secret,
+                skip_save=skip_save,
+            )
+        )
+        _INFLIGHT_CREDENTIALS[key] = task
+
+        def _clear_inflight(done: asyncio.Task) -> None:
+            if _INFLIGHT_CREDENTIALS.get(key) is done:
+                del _INFLIGHT_CREDENTIALS[key]
+
+        task.add_done_callback(_clear_inflight)
+    else:
+        logger.debug("[get_credentials] Joining in-flight lookup for '%s'", user_google_email)
+
+    # Shield so one cancelled caller does not cancel the lookup for the others
+    return await asyncio.shield(task)
+
+
 # --- Centralized Google Service Authentication ---
 
+# Credentials recently resolved by get_authenticated_google_service, keyed by
+# (client_id, user_google_email), so bursts of tool calls skip get_credentials
+_RECENT_CREDENTIALS_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_RECENT_CREDENTIALS_CACHE_LOCK = threading.Lock()
+
+
+def _get_recent_credentials(
+    key: Tuple[Optional[str], str], required_scopes: List[str]
+) -> Optional[Credentials]:
+    """Returns recently resolved credentials if still valid and covering the scopes."""
+    with _RECENT_CREDENTIALS_CACHE_LOCK:
+        credentials = _RECENT_CREDENTIALS_CACHE.get(key)
+        if credentials is None:
+            return None
+        if not credentials.valid:
+            del _RECENT_CREDENTIALS_CACHE[key]
+            return None
+    if not frozenset(required_scopes).issubset(credentials.scopes or ()):
+        return None
+    return credentials
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_id_token_unverified(id_token: str) -> Dict[str, Any]:
+    """Decodes an id_token payload without signature verification (logging only)."""
+    import jwt
+
+    return jwt.decode(id_token, options={"verify_signature": False})
+
+
+async def _build_service(service_name: str, version: str, credentials: Credentials) -> Any:
+    """
+    Builds a Google API client off the event loop from the bundled discovery document.
+    Built clients are cached per user and scopes by auth.service_decorator.
+    """
+    from googleapiclient.discovery import build
+
+    return await asyncio.to_thread(
+        build,
+        service_name,
+        version,
+        credentials=credentials,
+        cache_discovery=False,
+        static_discovery=True,
+    )
+
+
+# Resolved on first use; core.server imports this module, so it can't be imported at load time
+_redirect_uri_fn: Optional[Callable[[], str]] = None
+
+
+def _get_redirect_uri_for_current_mode() -> str:
+    """Returns core.server's OAuth redirect URI for the current transport mode."""
+    global _redirect_uri_fn
+    if _redirect_uri_fn is None:
+        from core.server import get_oauth_redirect_uri_for_current_mode
+
+        _redirect_uri_fn = get_oauth_redirect_uri_for_current_mode
+    return _redirect_uri_fn()
+
 
 class GoogleAuthenticationError(Exception):
     """Exception raised when Google authentication is required or fails."""
@@ -872,6 +1494,7 @@ async def get_authenticated_google_service(
     logger.info(
         f"[{tool_name}] Attempting to get authenticated {service_name} service. Email: '{user_google_email}'"
     )
+    _ensure_token_refresher()
     
     # Log OAuth credentials if provided
     if client_id:
@@ -885,17 +1508,27 @@ async def get_authenticated_google_service(
         logger.info(f"[{tool_name}] {error_msg}")
         raise GoogleAuthenticationError(error_msg)
 
-    credentials = await asyncio.to_thread(
-        get_credentials,
-        user_google_email=user_google_email,
-        required_scopes=required_scopes,
-        client_secrets_path=CONFIG_CLIENT_SECRETS_PATH,
-        session_id=None,  # Session ID not available in service layer
-        provided_client_id=client_id,
-        provided_client_secret=client_secret,
-    )
+    recent_key = (client_id, user_google_email)
+    credentials = _get_recent_credentials(recent_key, required_scopes)
+    if credentials is None:
+        credentials = await _get_credentials_coalesced(
+            user_google_email=user_google_email,
+            required_scopes=required_scopes,
+            client_secrets_path=CONFIG_CLIENT_SECRETS_PATH,
+            session_id=None,  # Session ID not available in service layer
+            provided_client_id=client_id,
+            provided_client_secret=client_secret,
+            skip_save=True,  # Persist refreshed tokens off the request path
+        )
+        with _RECENT_CREDENTIALS_CACHE_LOCK:
+            if credentials is not None:
+                _RECENT_CREDENTIALS_CACHE[recent_key] = credentials
+            else:
+                # Refresh failed or re-auth is needed; don't serve stale credentials
+                _RECENT_CREDENTIALS_CACHE.pop(recent_key, None)
 
-    if not credentials or not credentials.valid:
+    # get_credentials returns either valid credentials or None
+    if credentials is None:
         logger.warning(
             f"[{tool_name}] No valid credentials. Email: '{user_google_email}'."
         )
@@ -903,11 +1536,8 @@ async def get_authenticated_google_service(
             f"[{tool_name}] Valid email '{user_google_email}' provided, initiating auth flow."
         )
 
-        # Import here to avoid circular import
-        from core.server import get_oauth_redirect_uri_for_current_mode
-
         # Ensure OAuth callback is available
-        redirect_uri = get_oauth_redirect_uri_for_current_mode()
+        redirect_uri = _get_redirect_uri_for_current_mode()
         # Note: We don't know the transport mode here, but the server should have set it
 
         # Generate auth URL and raise exception with it
@@ -924,22 +1554,20 @@ async def get_authenticated_google_service(
         raise GoogleAuthenticationError(auth_response)
 
     try:
-        service = build(service_name, version, credentials=credentials)
+        service = await _build_service(service_name, version, credentials)
         log_user_email = user_google_email
 
         # Try to get email from credentials if needed for validation
         if credentials and credentials.id_token:
             try:
                 # Decode without verification (just to get email for logging)
-                decoded_token = jwt.decode(
-                    credentials.id_token, options={"verify_signature": False}
-                )
+                decoded_token = _decode_id_token_unverified(credentials.id_token)
                 token_email = decoded_token.get("email")
                 if token_email:
                     log_user_email = token_email
-                    logger.info(f"[{tool_name}] Token email: {token_email}")
+                    logger.info("[%s] Token email: %s", tool_name, token_email)
             except Exception as e:
-                logger.debug(f"[{tool_name}] Could not decode id_token: {e}")
+                logger.debug("[%s] Could not decode id_token: %s", tool_name, e)
 
         logger.info(
             f"[{tool_name}] Successfully authenticated {service_name} service for user: {log_user_email}"
@@ -18,7 +18,7 @@ from typing import Optional
 from urllib.parse import urlparse
 
 from auth.google_auth import handle_auth_callback, check_client_secrets
-from auth.scopes import OAUTH_STATE_TO_SESSION_ID_MAP, OAUTH_STATE_TO_SESSION_INFO_MAP, SCOPES, get_oauth_state
+from auth.scopes import OAUTH_STATE_TO_SESSION_ID_MAP, OAUTH_STATE_TO_SESSION_INFO_MAP, SCOPES_LIST, get_oauth_state
 from auth.oauth_responses import create_error_response, create_success_response, create_server_error_response
 
 logger = logging.getLogger(__name__)
@@ -64,7 +64,7 @@ class MinimalOAuthServer:
                 logger.info(f"OAuth callback: Received code (state: {state}). Attempting to exchange for tokens.")
 
                 # Get OAuth state info with Redis fallback
-                state_info = get_oauth_state(state)
+                state_info = await get_oauth_state(state)
                 client_id = None
                 client_secret = None
                 mcp_session_id = None
@@ -87,8 +87,8 @@ class MinimalOAuthServer:
 
                 # Exchange code for credentials
                 redirect_uri = get_oauth_redirect_uri(port=self.port, base_uri=self.base_uri)
-                verified_user_id, credentials = handle_auth_callback(
-                    scopes=SCOPES,
+                verified_user_id, credentials = await handle_auth_callback(
+                    scopes=SCOPES_LIST,
                     authorization_response=str(request.url),
                     redirect_uri=redirect_uri,
                     session_id=mcp_session_id,
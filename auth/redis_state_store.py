@@ -8,15 +8,28 @@ multiple instances.
 
 import os
 import json
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import threading
+import weakref
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, Union
 from datetime import timedelta
 
-import redis
-from redis.exceptions import RedisError
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+# orjson is an optional speedup for OAuth state (de)serialization
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# orjson returns bytes, which Redis stores as-is; orjson.JSONDecodeError subclasses json's
+_json_dumps = orjson.dumps if orjson is not None else json.dumps
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 class RedisStateStore:
     """Manages OAuth state storage in Redis."""
@@ -29,31 +42,67 @@ class RedisStateStore:
             redis_url: Redis URL (defaults to REDIS_URL env var or localhost)
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self._client: Optional[redis.Redis] = None
+        # asyncio clients are bound to the loop that created their connections,
+        # so each event loop gets its own pooled client
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.max_connections = 50
+        self.pool_timeout = 5  # Seconds to wait for a free pooled connection
         self.ttl = timedelta(minutes=10)  # OAuth state TTL
+        self._getdel_supported = True  # Cleared on servers older than Redis 6.2
+        self._getex_supported = True  # Cleared on servers older than Redis 6.2
+        self._keepttl_supported = True  # Cleared on servers older than Redis 6.0
         self.enabled = True
         
-    @property
-    def client(self) -> Optional[redis.Redis]:
-        """Get Redis client with lazy initialization."""
-        if self._client is None and self.enabled:
+    async def get_async_client(self) -> Optional[aioredis.Redis]:
+        """Get the pooled asyncio Redis client for the running event loop."""
+        if not self.enabled:
+            return None
+            
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                # Payloads are JSON parsed straight from bytes; skip decoding every reply
+                decode_responses=False,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+            client = aioredis.Redis(connection_pool=pool)
+            # Register before the ping so concurrent callers on this loop share the pool
+            self._async_clients[loop] = client
             try:
-                self._client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
                 # Test connection
-                self._client.ping()
-                logger.info(f"Connected to Redis at {self.redis_url}")
+                await client.ping()
+                logger.info(f"Connected asyncio Redis pool at {self.redis_url}")
             except (RedisError, OSError) as e:
                 logger.warning(f"Failed to connect to Redis: {e}. Falling back to in-memory storage.")
                 self.enabled = False
+                self._async_clients.pop(loop, None)
+                _use_null_store(self)
                 return None
-        return self._client
+        return client
+    
+    @staticmethod
+    def _session_creds_key(session_id: str) -> str:
+        """Redis key for a session's credentials."""
+        return f"session_creds:{session_id}"
     
-    def store_oauth_state(self, state: str, session_id: Optional[str], 
+    @staticmethod
+    def _user_creds_key(user_email: str, client_id: str) -> str:
+        """Redis key for a user's credentials (includes client_id for tenant isolation)."""
+        return f"user_creds:{client_id}:{user_email}"
+    
+    @staticmethod
+    def _refresh_lock_key(user_email: str, client_id: str) -> str:
+        """Redis key claiming a user's background token refresh across instances."""
+        return f"refresh_lock:{client_id}:{user_email}"
+    
+    async def store_oauth_state(self, state: str, session_id: Optional[str], 
                          client_id: Optional[str], client_secret: Optional[str]) -> bool:
         """
         Store OAuth state information in Redis.
@@ -67,7 +116,8 @@ class RedisStateStore:
         Returns:
             True if stored successfully, False otherwise
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return False
             
         try:
@@ -78,19 +128,19 @@ class RedisStateStore:
             }
             
             key = f"oauth_state:{state}"
-            self.client.setex(
+            await client.setex(
                 key,
                 self.ttl,
-                json.dumps(data)
+                _json_dumps(data)
             )
-            logger.debug(f"Stored OAuth state in Redis: {state}")
+            logger.debug("Stored OAuth state in Redis: %s", state)
             return True
             
         except RedisError as e:
             logger.error(f"Failed to store OAuth state in Redis: {e}")
             return False
     
-    def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+    async def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve and remove OAuth state information from Redis.
         
@@ -100,63 +150,103 @@ class RedisStateStore:
         Returns:
             Dict with session_id, client_id, client_secret or None
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return None
             
         try:
             key = f"oauth_state:{state}"
             
-            # Get and delete atomically
-            pipeline = self.client.pipeline()
-            pipeline.get(key)
-            pipeline.delete(key)
-            results = pipeline.execute()
-            
-            data_str = results[0]
-            if data_str:
-                logger.debug(f"Retrieved OAuth state from Redis: {state}")
-                return json.loads(data_str)
+            data = await self._getdel(client, key)
+            if data:
+                logger.debug("Retrieved OAuth state from Redis: %s", state)
+                return _json_loads(data)
             else:
-                logger.debug(f"OAuth state not found in Redis: {state}")
+                logger.debug("OAuth state not found in Redis: %s", state)
                 return None
                 
         except (RedisError, json.JSONDecodeError) as e:
             logger.error(f"Failed to retrieve OAuth state from Redis: {e}")
             return None
     
-    def store_session_credentials(self, session_id: str, credentials_json: str, 
-                                 ttl: Optional[timedelta] = None) -> bool:
+    async def _getdel(self, client: aioredis.Redis, key: str) -> Optional[bytes]:
+        """Get and delete a key atomically, preferring GETDEL (Redis >= 6.2)."""
+        if self._getdel_supported:
+            try:
+                return await client.getdel(key)
+            except ResponseError as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                logger.info("Redis server lacks GETDEL; using MULTI/EXEC GET+DEL")
+                self._getdel_supported = False
+        # Keep the transaction so a state can only be consumed once
+        results = await client.pipeline().get(key).delete(key).execute()
+        return results[0]
+    
+    async def _getex(self, client: aioredis.Redis, key: str, ttl: timedelta) -> Optional[bytes]:
+        """Get a key and refresh its TTL, preferring GETEX (Redis >= 6.2)."""
+        if self._getex_supported:
+            try:
+                return await client.getex(key, ex=ttl)
+            except ResponseError as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                logger.info("Redis server lacks GETEX; using pipelined GET+EXPIRE")
+                self._getex_supported = False
+        # EXPIRE on a missing key is a no-op, so both can go in one round-trip
+        results = await client.pipeline(transaction=False).get(key).expire(key, ttl).execute()
+        return results[0]
+    
+    async def _set_keep_ttl(self, client: aioredis.Redis, key: str, value: bytes) -> bool:
+        """Overwrite an existing key keeping its TTL, preferring SET KEEPTTL (Redis >= 6.0)."""
+        if self._keepttl_supported:
+            try:
+                return bool(await client.set(key, value, xx=True, keepttl=True))
+            except ResponseError as e:
+                if "syntax error" not in str(e).lower():
+                    raise
+                logger.info("Redis server lacks SET KEEPTTL; using PTTL + SET PX")
+                self._keepttl_supported = False
+        pttl = await client.pttl(key)
+        if pttl <= 0:
+            # Missing (-2), already expiring, or persistent (-1) keys are left untouched
+            return False
+        return bool(await client.set(key, value, xx=True, px=pttl))
+    
+    async def store_session_credentials(self, session_id: str, credentials_json: bytes, 
+                                       ttl: Optional[timedelta] = None) -> bool:
         """
         Store session credentials in Redis.
         
         Args:
             session_id: MCP session ID
-            credentials_json: JSON string of credentials
+            credentials_json: UTF-8 JSON of credentials
             ttl: Time to live (defaults to 30 minutes)
             
         Returns:
             True if stored successfully, False otherwise
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return False
             
         try:
-            key = f"session_creds:{session_id}"
+            key = self._session_creds_key(session_id)
             ttl = ttl or timedelta(minutes=30)
             
-            self.client.setex(
+            await client.setex(
                 key,
                 ttl,
                 credentials_json
             )
-            logger.debug(f"Stored session credentials in Redis: {session_id}")
+            logger.debug("Stored session credentials in Redis: %s", session_id)
             return True
             
         except RedisError as e:
             logger.error(f"Failed to store session credentials in Redis: {e}")
             return False
     
-    def get_session_credentials(self, session_id: str) -> Optional[str]:
+    async def get_session_credentials(self, session_id: str) -> Optional[bytes]:
         """
         Retrieve session credentials from Redis.
         
@@ -164,19 +254,19 @@ class RedisStateStore:
             session_id: MCP session ID
             
         Returns:
-            JSON string of credentials or None
+            UTF-8 JSON of credentials or None
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return None
             
         try:
-            key = f"session_creds:{session_id}"
-            creds = self.client.get(key)
+            key = self._session_creds_key(session_id)
+            # Read and refresh TTL on access in one round-trip
+            creds = await self._getex(client, key, timedelta(minutes=30))
             
             if creds:
-                # Refresh TTL on access
-                self.client.expire(key, timedelta(minutes=30))
-                logger.debug(f"Retrieved session credentials from Redis: {session_id}")
+                logger.debug("Retrieved session credentials from Redis: %s", session_id)
                 
             return creds
             
@@ -184,7 +274,7 @@ class RedisStateStore:
             logger.error(f"Failed to retrieve session credentials from Redis: {e}")
             return None
     
-    def delete_session_credentials(self, session_id: str) -> bool:
+    async def delete_session_credentials(self, session_id: str) -> bool:
         """
         Delete session credentials from Redis.
         
@@ -194,55 +284,65 @@ class RedisStateStore:
         Returns:
             True if deleted successfully, False otherwise
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return False
             
         try:
-            key = f"session_creds:{session_id}"
-            deleted = self.client.delete(key)
+            key = self._session_creds_key(session_id)
+            deleted = await client.delete(key)
             if deleted:
-                logger.debug(f"Deleted session credentials from Redis: {session_id}")
+                logger.debug("Deleted session credentials from Redis: %s", session_id)
             return bool(deleted)
             
         except RedisError as e:
             logger.error(f"Failed to delete session credentials from Redis: {e}")
             return False
     
-    def store_user_credentials(self, user_email: str, client_id: str, 
-                              credentials_json: str, ttl: Optional[timedelta] = None) -> bool:
+    async def store_user_credentials(self, user_email: str, client_id: str, 
+                              credentials_json: bytes, ttl: Optional[timedelta] = None,
+                              keep_ttl: bool = False) -> bool:
         """
         Store user credentials in Redis with tenant isolation.
         
         Args:
             user_email: User's Google email
             client_id: OAuth client ID (for tenant isolation)
-            credentials_json: JSON string of credentials
+            credentials_json: UTF-8 JSON of credentials
             ttl: Time to live (defaults to 7 days)
+            keep_ttl: Overwrite only an existing key and keep its remaining TTL
+                (SET XX KEEPTTL, Redis >= 6.0) instead of resetting it
             
         Returns:
             True if stored successfully, False otherwise
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return False
             
         try:
             # Key includes client_id for tenant isolation
-            key = f"user_creds:{client_id}:{user_email}"
+            key = self._user_creds_key(user_email, client_id)
             ttl = ttl or timedelta(days=7)  # Longer TTL for user credentials
             
-            self.client.setex(
-                key,
-                ttl,
-                credentials_json
-            )
-            logger.debug(f"Stored user credentials in Redis: {user_email} (tenant: {client_id[:10]}...)")
+            if keep_ttl:
+                if not await self._set_keep_ttl(client, key, credentials_json):
+                    logger.debug("User credentials expired before update, not stored: %s", user_email)
+                    return False
+            else:
+                await client.setex(
+                    key,
+                    ttl,
+                    credentials_json
+                )
+            logger.debug("Stored user credentials in Redis: %s (tenant: %s...)", user_email, client_id[:10])
             return True
             
         except RedisError as e:
             logger.error(f"Failed to store user credentials in Redis: {e}")
             return False
     
-    def get_user_credentials(self, user_email: str, client_id: str) -> Optional[str]:
+    async def get_user_credentials(self, user_email: str, client_id: str) -> Optional[bytes]:
         """
         Retrieve user credentials from Redis with tenant isolation.
         
@@ -251,19 +351,19 @@ class RedisStateStore:
             client_id: OAuth client ID (for tenant isolation)
             
         Returns:
-            JSON string of credentials or None
+            UTF-8 JSON of credentials or None
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return None
             
         try:
-            key = f"user_creds:{client_id}:{user_email}"
-            creds = self.client.get(key)
+            key = self._user_creds_key(user_email, client_id)
+            # Read and refresh TTL on access in one round-trip
+            creds = await self._getex(client, key, timedelta(days=7))
             
             if creds:
-                # Refresh TTL on access
-                self.client.expire(key, timedelta(days=7))
-                logger.debug(f"Retrieved user credentials from Redis: {user_email} (tenant: {client_id[:10]}...)")
+                logger.debug("Retrieved user credentials from Redis: %s (tenant: %s...)", user_email, client_id[:10])
                 
             return creds
             
@@ -271,7 +371,122 @@ class RedisStateStore:
             logger.error(f"Failed to retrieve user credentials from Redis: {e}")
             return None
     
-    def delete_user_credentials(self, user_email: str, client_id: str) -> bool:
+    async def store_credentials(self, user_email: str, client_id: str,
+                                session_id: Optional[str], credentials_json: bytes) -> bool:
+        """
+        Store user credentials and, optionally, session credentials in one pipelined round-trip.
+        
+        Args:
+            user_email: User's Google email
+            client_id: OAuth client ID (for tenant isolation)
+            session_id: MCP session ID, or None to store only the user credentials
+            credentials_json: UTF-8 JSON of credentials, shared by both keys
+            
+        Returns:
+            True if stored successfully, False otherwise
+        """
+        client = await self.get_async_client()
+        if not client:
+            return False
+            
+        try:
+            async with client.pipeline(transaction=False) as pipeline:
+                pipeline.setex(self._user_creds_key(user_email, client_id), timedelta(days=7), credentials_json)
+                if session_id:
+                    pipeline.setex(self._session_creds_key(session_id), timedelta(minutes=30), credentials_json)
+                await pipeline.execute()
+            logger.debug("Stored credentials in Redis: %s (tenant: %s..., session: %s)", user_email, client_id[:10], session_id)
+            return True
+            
+        except RedisError as e:
+            logger.error(f"Failed to store credentials in Redis: {e}")
+            return False
+    
+    async def get_many_user_credentials(self, users: List[Tuple[str, str]]) -> List[Optional[bytes]]:
+        """
+        Retrieve credentials for many users with a single MGET.
+        
+        Args:
+            users: List of (user_email, client_id) tuples
+            
+        Returns:
+            UTF-8 JSON of credentials (or None) in the same order as users
+        """
+        if not users:
+            return []
+        client = await self.get_async_client()
+        if not client:
+            return [None] * len(users)
+            
+        try:
+            keys = [self._user_creds_key(user_email, client_id) for user_email, client_id in users]
+            creds = await client.mget(keys)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Retrieved %d/%d user credentials from Redis", len(keys) - creds.count(None), len(keys)
+                )
+            return creds
+            
+        except RedisError as e:
+            logger.error(f"Failed to retrieve user credentials from Redis: {e}")
+            return [None] * len(users)
+    
+    async def scan_user_credentials(self, batch_size: int = 500) -> AsyncIterator[List[Tuple[str, str]]]:
+        """
+        Iterate over all users with credentials stored in Redis, in batches.
+        
+        Args:
+            batch_size: Maximum number of users per batch
+            
+        Yields:
+            Lists of (user_email, client_id) tuples
+        """
+        client = await self.get_async_client()
+        if not client:
+            return
+            
+        try:
+            users = []
+            async for key in client.scan_iter(match="user_creds:*", count=batch_size):
+                _, client_id, user_email = key.decode().split(":", 2)
+                users.append((user_email, client_id))
+                if len(users) >= batch_size:
+                    yield users
+                    users = []
+            if users:
+                yield users
+            
+        except RedisError as e:
+            logger.error(f"Failed to scan user credentials in Redis: {e}")
+    
+    async def acquire_refresh_lock(self, user_email: str, client_id: str, ttl: timedelta) -> bool:
+        """
+        Claim a user's background token refresh so only one instance performs it.
+        
+        The claim is not released; it expires after ttl, so other instances skip
+        the user until then.
+        
+        Args:
+            user_email: User's Google email
+            client_id: OAuth client ID (for tenant isolation)
+            ttl: How long the claim is held
+            
+        Returns:
+            True if this instance should refresh, False otherwise
+        """
+        client = await self.get_async_client()
+        if not client:
+            return True
+            
+        try:
+            key = self._refresh_lock_key(user_email, client_id)
+            return bool(await client.set(key, b"1", nx=True, px=ttl))
+            
+        except RedisError as e:
+            logger.error(f"Failed to acquire refresh lock in Redis: {e}")
+            return False
+    
+    async def delete_user_credentials(self, user_email: str, client_id: str) -> bool:
         """
         Delete user credentials from Redis.
         
@@ -282,47 +497,119 @@ class RedisStateStore:
         Returns:
             True if deleted successfully, False otherwise
         """
-        if not self.client:
+        client = await self.get_async_client()
+        if not client:
             return False
             
         try:
-            key = f"user_creds:{client_id}:{user_email}"
-            deleted = self.client.delete(key)
+            key = self._user_creds_key(user_email, client_id)
+            deleted = await client.delete(key)
             if deleted:
-                logger.debug(f"Deleted user credentials from Redis: {user_email} (tenant: {client_id[:10]}...)")
+                logger.debug("Deleted user credentials from Redis: %s (tenant: %s...)", user_email, client_id[:10])
             return bool(deleted)
             
         except RedisError as e:
             logger.error(f"Failed to delete user credentials from Redis: {e}")
             return False
     
-    def close(self):
-        """Close Redis connection."""
-        if self._client:
+    async def close(self):
+        """Close the Redis connection pool for the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client:
             try:
-                self._client.close()
+                await client.connection_pool.disconnect()
                 logger.info("Closed Redis connection")
             except Exception as e:
                 logger.error(f"Error closing Redis connection: {e}")
-            finally:
-                self._client = None
+        # Pools bound to other event loops are dropped with their loops
+        self._async_clients.clear()
+
+
+class NullStateStore:
+    """
+    Stand-in for RedisStateStore once Redis is known to be unreachable.
+
+    Every operation reports a miss or failure immediately, so callers fall back to their
+    in-memory storage without attempting a connection.
+    """
+    
+    enabled = False
+    
+    async def get_async_client(self) -> None:
+        return None
+    
+    async def store_oauth_state(self, state: str, session_id: Optional[str],
+                                client_id: Optional[str], client_secret: Optional[str]) -> bool:
+        return False
+    
+    async def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        return None
+    
+    async def store_session_credentials(self, session_id: str, credentials_json: bytes,
+                                        ttl: Optional[timedelta] = None) -> bool:
+        return False
+    
+    async def get_session_credentials(self, session_id: str) -> Optional[bytes]:
+        return None
+    
+    async def delete_session_credentials(self, session_id: str) -> bool:
+        return False
+    
+    async def store_user_credentials(self, user_email: str, client_id: str,
+                                     credentials_json: bytes, ttl: Optional[timedelta] = None,
+                                     keep_ttl: bool = False) -> bool:
+        return False
+    
+    async def get_user_credentials(self, user_email: str, client_id: str) -> Optional[bytes]:
+        return None
+    
+    async def store_credentials(self, user_email: str, client_id: str,
+                                session_id: Optional[str], credentials_json: bytes) -> bool:
+        return False
+    
+    async def get_many_user_credentials(self, users: List[Tuple[str, str]]) -> List[Optional[bytes]]:
+        return [None] * len(users)
+    
+    async def scan_user_credentials(self, batch_size: int = 500) -> AsyncIterator[List[Tuple[str, str]]]:
+        return
+        yield  # Makes this an async generator that yields nothing
+    
+    async def acquire_refresh_lock(self, user_email: str, client_id: str, ttl: timedelta) -> bool:
+        return True  # No other instance can share these credentials
+    
+    async def delete_user_credentials(self, user_email: str, client_id: str) -> bool:
+        return False
+    
+    async def close(self):
+        pass
 
 
 # Global instance
-_redis_store: Optional[RedisStateStore] = None
+_redis_store: Optional[Union[RedisStateStore, NullStateStore]] = None
+_redis_store_lock = threading.Lock()
+
+
+def _use_null_store(failed_store: RedisStateStore) -> None:
+    """Replace the global store with a NullStateStore after failed_store lost Redis."""
+    global _redis_store
+    with _redis_store_lock:
+        if _redis_store is failed_store:
+            _redis_store = NullStateStore()
 
 
-def get_redis_store() -> RedisStateStore:
+def get_redis_store() -> Union[RedisStateStore, NullStateStore]:
     """Get or create the global Redis state store instance."""
     global _redis_store
     if _redis_store is None:
-        _redis_store = RedisStateStore()
+        with _redis_store_lock:
+            if _redis_store is None:
+                _redis_store = RedisStateStore()
     return _redis_store
 
 
-def close_redis_store():
+async def close_redis_store():
     """Close the global Redis state store."""
     global _redis_store
     if _redis_store:
-        _redis_store.close()
+        await _redis_store.close()
         _redis_store = None
\ No newline at end of file
@@ -5,7 +5,10 @@ This module centralizes OAuth scope definitions for Google Workspace integration
 Separated from service_decorator.py to avoid circular imports.
 """
 import logging
-from typing import Dict, Optional, NamedTuple
+import threading
+from typing import FrozenSet, List, Optional, NamedTuple
+
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +18,18 @@ class OAuthStateInfo(NamedTuple):
     client_id: Optional[str]
     client_secret: Optional[str]
 
-# Temporary map to associate OAuth state with session info and credentials
-# This should ideally be a more robust cache in a production system (e.g., Redis)
-OAUTH_STATE_TO_SESSION_INFO_MAP: Dict[str, OAuthStateInfo] = {}
+# In-memory fallback associating OAuth state with session info and credentials when Redis
+# is unavailable. Bounded and expiring with the Redis state TTL so abandoned flows don't leak.
+OAUTH_STATE_TO_SESSION_INFO_MAP: TTLCache = TTLCache(maxsize=10_000, ttl=600)
 
 # Legacy map for backward compatibility
-OAUTH_STATE_TO_SESSION_ID_MAP: Dict[str, str] = {}
+OAUTH_STATE_TO_SESSION_ID_MAP: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+
+# Guards both maps; TTLCache is not thread-safe and the stdio callback server runs in a thread
+_OAUTH_STATE_LOCK = threading.Lock()
 
-# Import Redis store functions
-try:
-    from auth.redis_state_store import get_redis_store
-    _redis_available = True
-except ImportError:
-    logger.warning("Redis state store not available, using in-memory storage only")
-    _redis_available = False
+# Redis-backed state store (a no-op NullStateStore once Redis is unreachable)
+from auth.redis_state_store import get_redis_store
 
 # Individual OAuth Scope Constants
 USERINFO_EMAIL_SCOPE = 'https://www.googleapis.com/auth/userinfo.email'
@@ -74,68 +75,82 @@ TASKS_SCOPE = 'https://www.googleapis.com/auth/tasks'
 TASKS_READONLY_SCOPE = 'https://www.googleapis.com/auth/tasks.readonly'
 
 # Base OAuth scopes required for user identification
-BASE_SCOPES = [
+BASE_SCOPES = frozenset({
     USERINFO_EMAIL_SCOPE,
     OPENID_SCOPE
-]
+})
 
 # Service-specific scope groups
-DOCS_SCOPES = [
+DOCS_SCOPES = frozenset({
     DOCS_READONLY_SCOPE,
     DOCS_WRITE_SCOPE
-]
+})
 
-CALENDAR_SCOPES = [
+CALENDAR_SCOPES = frozenset({
     CALENDAR_READONLY_SCOPE,
     CALENDAR_EVENTS_SCOPE
-]
+})
 
-DRIVE_SCOPES = [
+DRIVE_SCOPES = frozenset({
     DRIVE_READONLY_SCOPE,
     DRIVE_FILE_SCOPE
-]
+})
 
-GMAIL_SCOPES = [
+GMAIL_SCOPES = frozenset({
     GMAIL_READONLY_SCOPE,
     GMAIL_SEND_SCOPE,
     GMAIL_COMPOSE_SCOPE,
     GMAIL_MODIFY_SCOPE,
     GMAIL_LABELS_SCOPE
-]
+})
 
-CHAT_SCOPES = [
+CHAT_SCOPES = frozenset({
     CHAT_READONLY_SCOPE,
     CHAT_WRITE_SCOPE,
     CHAT_SPACES_SCOPE
-]
+})
 
-SHEETS_SCOPES = [
+SHEETS_SCOPES = frozenset({
     SHEETS_READONLY_SCOPE,
     SHEETS_WRITE_SCOPE
-]
+})
 
-FORMS_SCOPES = [
+FORMS_SCOPES = frozenset({
     FORMS_BODY_SCOPE,
     FORMS_BODY_READONLY_SCOPE,
     FORMS_RESPONSES_READONLY_SCOPE
-]
+})
 
-SLIDES_SCOPES = [
+SLIDES_SCOPES = frozenset({
     SLIDES_SCOPE,
     SLIDES_READONLY_SCOPE
-]
+})
 
-TASKS_SCOPES = [
+TASKS_SCOPES = frozenset({
     TASKS_SCOPE,
     TASKS_READONLY_SCOPE
-]
+})
 
 # Combined scopes for all supported Google Workspace operations
-SCOPES = list(set(BASE_SCOPES + CALENDAR_SCOPES + DRIVE_SCOPES + GMAIL_SCOPES + DOCS_SCOPES + CHAT_SCOPES + SHEETS_SCOPES + FORMS_SCOPES + SLIDES_SCOPES + TASKS_SCOPES))
+SCOPES: FrozenSet[str] = frozenset().union(
+    BASE_SCOPES,
+    CALENDAR_SCOPES,
+    DRIVE_SCOPES,
+    GMAIL_SCOPES,
+    DOCS_SCOPES,
+    CHAT_SCOPES,
+    SHEETS_SCOPES,
+    FORMS_SCOPES,
+    SLIDES_SCOPES,
+    TASKS_SCOPES,
+)
+# Sorted list form for OAuth flows (oauthlib only accepts list/tuple scopes),
+# so the scope order in authorization URLs is stable across processes
+SCOPES_LIST: List[str] = sorted(SCOPES)
 
 
 # Helper functions for state management with Redis fallback
-def store_oauth_state(state: str, session_id: Optional[str], 
+async def store_oauth_state(state: str, session_id: Optional[str], 
                      client_id: Optional[str], client_secret: Optional[str]) -> None:
     """
     Store OAuth state with Redis fallback to in-memory.
@@ -147,27 +162,23 @@ def store_oauth_state(state: str, session_id: Optional[str],
         client_secret: OAuth client secret
     """
     # Try Redis first
-    if _redis_available:
-        try:
-            redis_store = get_redis_store()
-            if redis_store.store_oauth_state(state, session_id, client_id, client_secret):
-                logger.debug(f"Stored OAuth state in Redis: {state}")
-                return
-        except Exception as e:
-            logger.warning(f"Failed to store in Redis, falling back to memory: {e}")
+    if await get_redis_store().store_oauth_state(state, session_id, client_id, client_secret):
+        logger.debug(f"Stored OAuth state in Redis: {state}")
+        return
     
     # Fallback to in-memory
     state_info = OAuthStateInfo(session_id=session_id, client_id=client_id, client_secret=client_secret)
-    OAUTH_STATE_TO_SESSION_INFO_MAP[state] = state_info
-    
-    # Also update legacy map for backward compatibility
-    if session_id:
-        OAUTH_STATE_TO_SESSION_ID_MAP[state] = session_id
+    with _OAUTH_STATE_LOCK:
+        OAUTH_STATE_TO_SESSION_INFO_MAP[state] = state_info
+        
+        # Also update legacy map for backward compatibility
+        if session_id:
+            OAUTH_STATE_TO_SESSION_ID_MAP[state] = session_id
     
     logger.debug(f"Stored OAuth state in memory: {state}")
 
 
-def get_oauth_state(state: str) -> Optional[OAuthStateInfo]:
+async def get_oauth_state(state: str) -> Optional[OAuthStateInfo]:
     """
     Retrieve OAuth state with Redis fallback to in-memory.
     
@@ -178,28 +189,24 @@ def get_oauth_state(state: str) -> Optional[OAuthStateInfo]:
         OAuthStateInfo or None
     """
     # Try Redis first
-    if _redis_available:
-        try:
-            redis_store = get_redis_store()
-            data = redis_store.get_oauth_state(state)
-            if data:
-                logger.debug(f"Retrieved OAuth state from Redis: {state}")
-                return OAuthStateInfo(
-                    session_id=data.get("session_id"),
-                    client_id=data.get("client_id"),
-                    client_secret=data.get("client_secret")
-                )
-        except Exception as e:
-            logger.warning(f"Failed to retrieve from Redis, falling back to memory: {e}")
+    data = await get_redis_store().get_oauth_state(state)
+    if data:
+        logger.debug(f"Retrieved OAuth state from Redis: {state}")
+        return OAuthStateInfo(
+            session_id=data.get("session_id"),
+            client_id=data.get("client_id"),
+            client_secret=data.get("client_secret")
+        )
     
     # Try in-memory map
-    state_info = OAUTH_STATE_TO_SESSION_INFO_MAP.pop(state, None)
+    with _OAUTH_STATE_LOCK:
+        state_info = OAUTH_STATE_TO_SESSION_INFO_MAP.pop(state, None)
+        session_id = OAUTH_STATE_TO_SESSION_ID_MAP.pop(state, None)
     if state_info:
         logger.debug(f"Retrieved OAuth state from memory: {state}")
         return state_info
     
     # Try legacy map as last resort
-    session_id = OAUTH_STATE_TO_SESSION_ID_MAP.pop(state, None)
     if session_id:
         logger.debug(f"Retrieved session ID from legacy map: {state}")
         return OAuthStateInfo(session_id=session_id, client_id=None, client_secret=None)
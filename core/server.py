@@ -52,7 +52,7 @@ from auth.scopes import (
     TASKS_SCOPE,
     TASKS_READONLY_SCOPE,
     TASKS_SCOPES,
-    SCOPES, get_oauth_state
+    SCOPES_LIST, get_oauth_state
 )
 
 # Configure logging
@@ -126,7 +126,7 @@ async def oauth2_callback(request: Request) -> HTMLResponse:
         logger.info(f"OAuth callback: Received code (state: {state}). Attempting to exchange for tokens.")
 
         # Get OAuth state info with Redis fallback
-        state_info = get_oauth_state(state)
+        state_info = await get_oauth_state(state)
         client_id = None
         client_secret = None
         mcp_session_id = None
@@ -149,8 +149,8 @@ async def oauth2_callback(request: Request) -> HTMLResponse:
 
         # Exchange code for credentials. handle_auth_callback will save them.
         # The user_id returned here is the Google-verified email.
-        verified_user_id, credentials = handle_auth_callback(
-            scopes=SCOPES, # Ensure all necessary scopes are requested
+        verified_user_id, credentials = await handle_auth_callback(
+            scopes=SCOPES_LIST, # Ensure all necessary scopes are requested
             authorization_response=str(request.url),
             redirect_uri=get_oauth_redirect_uri_for_current_mode(),
             session_id=mcp_session_id, # Pass session_id if available